@@ -1,29 +1,82 @@
-from transformers import pipeline
+import asyncio
+import functools
+import os
+import threading
+
+from config import LLM_GGUF_PATH, LLM_N_CTX
+
+# Nombre maximal de tokens générés par réponse
+MAX_NEW_TOKENS = 150
+
+# llama_cpp.Llama n'est pas thread-safe: un seul appel à la fois
+_model_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_model():
+    """
+    Charger le modèle GGUF quantifié (4 bits) une seule fois par processus.
+
+    Toutes les instances de ChatService partagent le même modèle, ce qui
+    évite de relire les poids depuis le disque à chaque instanciation.
+    llama_cpp est importé ici pour ne pas ralentir le démarrage de l'API.
+    """
+    from llama_cpp import Llama
+
+    return Llama(
+        model_path=LLM_GGUF_PATH,
+        n_threads=os.cpu_count(),
+        n_ctx=LLM_N_CTX,
+        verbose=False,
+    )
 
 
 class ChatService:
     def __init__(self):
-        self.context = """Je suis un assistant touristique spécialisé sur le Burkina Faso. 
+        self.context = """Je suis un assistant touristique spécialisé sur le Burkina Faso.
         Je peux vous aider à découvrir les sites touristiques, la culture, la cuisine et les traditions du pays."""
 
         self.conversation_history = []
-        self.model = pipeline('text-generation', model='gpt2')
+        self.model = _get_model()
 
-    async def get_response(self, user_message: str) -> str:
-        # Ajouter le message au contexte
-        full_context = f"{self.context}\nHistorique:\n"
-        # Garder les 3 derniers messages
-        for msg in self.conversation_history[-3:]:
-            full_context += f"{msg}\n"
+    def _build_prompt(self, user_message: str) -> str:
+        """
+        Construire le prompt en gardant les 3 derniers messages au plus.
+
+        Les messages les plus anciens sont retirés tant que le prompt et la
+        réponse attendue ne tiennent pas dans la fenêtre de contexte (n_ctx).
+        """
+        history = self.conversation_history[-3:]
+        while True:
+            full_context = f"{self.context}\nHistorique:\n"
+            for msg in history:
+                full_context += f"{msg}\n"
+            full_context += f"User: {user_message}\nAssistant:"
 
-        full_context += f"User: {user_message}\nAssistant:"
+            n_tokens = len(self.model.tokenize(full_context.encode("utf-8")))
+            if not history or n_tokens + MAX_NEW_TOKENS <= self.model.n_ctx():
+                return full_context
+            history = history[1:]
 
-        # Générer la réponse
-        response = self.model(full_context, max_length=150, num_return_sequences=1)[
-            0]['generated_text']
+    def _generate(self, user_message: str) -> dict:
+        """Générer une réponse; le modèle partagé n'est pas thread-safe."""
+        with _model_lock:
+            full_context = self._build_prompt(user_message)
+            return self.model(
+                full_context, max_tokens=MAX_NEW_TOKENS, stop=["User:"])
+
+    async def get_response(self, user_message: str) -> str:
+        # Générer la réponse dans un thread pour ne pas bloquer la boucle d'événements
+        loop = asyncio.get_running_loop()
+        try:
+            output = await loop.run_in_executor(
+                None, self._generate, user_message)
+        except ValueError:
+            # Le message seul dépasse la fenêtre de contexte du modèle
+            return "Votre message est trop long. Pouvez-vous le reformuler plus brièvement?"
 
         # Extraire la réponse générée
-        assistant_response = response.split("Assistant:")[-1].strip()
+        assistant_response = output["choices"][0]["text"].strip()
 
         # Mettre à jour l'historique
         self.conversation_history.append(f"User: {user_message}")
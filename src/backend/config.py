@@ -5,43 +5,93 @@ Ce module gère toutes les configurations de l'application, incluant
 les chemins, les modèles, et les paramètres du système RAG.
 """
 
+import functools
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Charger les variables d'environnement
-load_dotenv()
+
+@functools.lru_cache(maxsize=None)
+def _env() -> dict:
+    """Charger le fichier .env une seule fois et retourner l'environnement."""
+    load_dotenv()
+    return os.environ.copy()
+
+
+def _path_setting(name: str, default: Path) -> str:
+    """
+    Lire un chemin dans l'environnement.
+
+    Un chemin relatif est résolu depuis la racine du projet (BASE_DIR), et non
+    depuis le répertoire courant (l'API est lancée depuis src/backend).
+    Une valeur vide est conservée telle quelle (fonctionnalité désactivée).
+    """
+    value = _env().get(name)
+    if value is None:
+        return str(default)
+    if not value:
+        return ""
+    return str(BASE_DIR / value)
+
 
 # Chemins
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = BASE_DIR / "data"
 CORPUS_PATH = DATA_DIR / "corpus.json"
 CHROMA_DB_PATH = DATA_DIR / "chroma_db"
+FAISS_INDEX_PATH = DATA_DIR / "faiss_index"
+ONNX_MODELS_PATH = DATA_DIR / "onnx"
+EMBEDDING_CACHE_PATH = DATA_DIR / "emb_cache.db"
 
 # Configuration de l'application
-APP_NAME = os.getenv("APP_NAME", "Burkina Tourisme Chatbot")
-APP_VERSION = os.getenv("APP_VERSION", "1.0.0")
-DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+APP_NAME = _env().get("APP_NAME", "Burkina Tourisme Chatbot")
+APP_VERSION = _env().get("APP_VERSION", "1.0.0")
+DEBUG = _env().get("DEBUG", "False").lower() == "true"
 
 # Configuration du serveur
-HOST = os.getenv("HOST", "0.0.0.0")
-PORT = int(os.getenv("PORT", 8000))
+HOST = _env().get("HOST", "0.0.0.0")
+PORT = int(_env().get("PORT", 8000))
 
 # Configuration du modèle d'embeddings (Sentence-Transformers)
 # Modèle multilingue léger qui supporte le français et d'autres langues
-EMBEDDING_MODEL = os.getenv(
+EMBEDDING_MODEL = _env().get(
     "EMBEDDING_MODEL",
     "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
 )
 
-# Configuration de la base de données vectorielle (ChromaDB)
-CHROMA_DB_PATH_STR = os.getenv("CHROMA_DB_PATH", str(CHROMA_DB_PATH))
+# Précision et parallélisme de l'inférence PyTorch (embeddings)
+# Sur GPU, le modèle d'embeddings est toujours converti en fp16; sur CPU,
+# bf16 n'est intéressant qu'avec un processeur récent (AVX512-BF16/AMX).
+EMBEDDING_CPU_BF16 = _env().get("EMBEDDING_CPU_BF16", "False").lower() == "true"
+TORCH_NUM_THREADS = int(_env().get("TORCH_NUM_THREADS", os.cpu_count() or 1))
+# Placer les modèles sur le GPU s'il est disponible; à désactiver pour les
+# processus qui ne doivent pas allouer de mémoire GPU (workers multiples)
+USE_GPU = _env().get("USE_GPU", "True").lower() == "true"
+
+# Configuration de la base de données vectorielle
+# "faiss" (index HNSW en mémoire, par défaut) ou "chroma" (ChromaDB)
+VECTOR_STORE = _env().get("VECTOR_STORE", "faiss").lower()
+CHROMA_DB_PATH_STR = _path_setting("CHROMA_DB_PATH", CHROMA_DB_PATH)
+FAISS_INDEX_PATH_STR = _path_setting("FAISS_INDEX_PATH", FAISS_INDEX_PATH)
+# Cache SQLite des embeddings du corpus (vide pour le désactiver)
+EMBEDDING_CACHE_PATH_STR = _path_setting(
+    "EMBEDDING_CACHE_PATH", EMBEDDING_CACHE_PATH)
 
 # Configuration du LLM (Ollama ou autre service LLM local)
 # Pour cette implémentation, nous utilisons une API locale ou Hugging Face Inference
-LLM_MODEL = os.getenv("LLM_MODEL", "mistral-7b")
-LLM_API_URL = os.getenv("LLM_API_URL", "http://localhost:8001/v1")
-LLM_API_KEY = os.getenv("LLM_API_KEY", "sk-default-key")
+LLM_MODEL = _env().get("LLM_MODEL", "mistral-7b")
+LLM_API_URL = _env().get("LLM_API_URL", "http://localhost:8001/v1")
+LLM_API_KEY = _env().get("LLM_API_KEY", "sk-default-key")
+
+# Modèle quantifié (GGUF 4 bits) servi par llama.cpp pour le ChatService
+LLM_GGUF_PATH = _path_setting(
+    "LLM_GGUF_PATH", BASE_DIR / "models" / "mistral-7b-q4_k_m.gguf")
+LLM_N_CTX = int(_env().get("LLM_N_CTX", 512))
+
+# Modèle Hugging Face utilisé localement par le système RAG, exporté en ONNX
+# (quantifié int8 sur CPU) lorsque optimum est installé
+LLM_LOCAL_MODEL = _env().get("LLM_LOCAL_MODEL", "gpt2")
+ONNX_MODELS_PATH_STR = _path_setting("ONNX_MODELS_PATH", ONNX_MODELS_PATH)
 
 # Configuration CORS
 CORS_ORIGINS = [
@@ -58,11 +108,21 @@ RAG_CONFIG = {
     "chunk_overlap": 50,  # Chevauchement entre les chunks
     "top_k": 5,  # Nombre de documents à récupérer
     "similarity_threshold": 0.3,  # Seuil de similarité minimum
+    # Paramètres des graphes HNSW (FAISS et ChromaDB)
+    "hnsw_m": 32,  # Voisins par noeud
+    "hnsw_ef_construction": 200,  # Largeur de recherche à la construction
+    "hnsw_ef_search": 64,  # Largeur de recherche par défaut des requêtes
+    "rerank_factor": 4,  # Candidats FAISS par document retenu, reclassés en exact
+    "embedding_batch_size": 64,  # Taille des lots pour l'encodage du corpus
+    "ingest_batch_size": 512,  # Documents lus puis indexés par lot
+    # Taille du cache LRU des embeddings de requêtes (0 pour le désactiver)
+    "query_cache_size": int(_env().get("QUERY_CACHE_SIZE", 4096)),
 }
 
 # Configuration des paramètres de génération du LLM
 LLM_GENERATION_CONFIG = {
-    "max_tokens": 512,
+    "max_input_tokens": 768,  # Taille maximale du prompt (tronqué à gauche)
+    "max_new_tokens": 256,  # Nombre maximal de tokens générés
     "temperature": 0.7,
     "top_p": 0.9,
     "top_k": 50,
@@ -71,3 +131,4 @@ LLM_GENERATION_CONFIG = {
 # Créer les répertoires nécessaires
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 Path(CHROMA_DB_PATH_STR).mkdir(parents=True, exist_ok=True)
+Path(FAISS_INDEX_PATH_STR).mkdir(parents=True, exist_ok=True)
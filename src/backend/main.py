@@ -10,17 +10,25 @@ Endpoints:
 - POST /api/init: Initialiser la base de données avec le corpus
 """
 
+import importlib
 import logging
+import mmap
+import os
 import sys
-import asyncio
 import re
+from collections import OrderedDict, defaultdict
 from pathlib import Path
 from typing import List, Dict, Optional, Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 
+try:
+    import ahocorasick  # pyahocorasick (optionnel)
+except ImportError:
+    ahocorasick = None
+
 sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
 try:
     from src.backend.config import (
@@ -31,7 +39,6 @@ try:
         CORS_ORIGINS,
         CORPUS_PATH,
     )
-    from src.backend.rag_system import RAGSystem
     from src.backend.data_loader import DataLoader
     from src.backend.chat_service import ChatService
 except Exception:
@@ -44,7 +51,6 @@ except Exception:
             CORS_ORIGINS,
             CORPUS_PATH,
         )
-        from rag_system import RAGSystem
         from data_loader import DataLoader
         from chat_service import ChatService
     except Exception:
@@ -56,7 +62,6 @@ except Exception:
             CORS_ORIGINS,
             CORPUS_PATH,
         )
-        from backend.rag_system import RAGSystem
         from backend.data_loader import DataLoader
         from backend.chat_service import ChatService
 
@@ -91,7 +96,7 @@ app.add_middleware(
 class ChatRequest(BaseModel):
     """Modèle pour une requête de chat."""
     query: str
-    top_k: Optional[int] = 5
+    top_k: Optional[int] = Field(5, ge=1)
 
 
 class ChatResponse(BaseModel):
@@ -120,39 +125,170 @@ class InitResponse(BaseModel):
 
 DATA_FILE = Path(__file__).resolve().parents[2] / "data" / "sources.txt"
 
+# Longueur maximale d'un extrait renvoyé par la recherche de secours
+MAX_SNIPPET_CHARS = 500
+
+# Mots de >=3 caractères alphanumériques (index des sources et requêtes)
+_WORD_RE = re.compile(r"\w{3,}")
+
+# Réponses RAG mémorisées par requête normalisée (LRU)
+RAG_CACHE_SIZE = 512
+_rag_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+# Incrémenté à chaque réinitialisation du corpus (/api/init)
+_corpus_generation = 0
+
 
 # Handlers startup / shutdown
 @app.on_event("startup")
 async def startup_event():
     logger.info("Startup: initialisation des sources.")
     try:
-        text = DATA_FILE.read_text(encoding="utf-8")
-        sources = [line.strip() for line in text.splitlines() if line.strip()]
+        sources = read_source_lines(DATA_FILE)
         logger.info(
-            f"{len(sources)} lignes de sources chargées depuis {DATA_FILE}")
+            "%d lignes de sources chargées depuis %s", len(sources), DATA_FILE)
     except Exception:
         logger.exception(
             "Impossible de lire le fichier de sources, démarrage sans sources.")
         sources = []
     app.state.sources = sources
+    app.state.word_index = build_word_index(sources)
+
+    # Regroupement des requêtes concurrentes en micro-lots pour le RAG
+    app.state.batched_rag = (
+        _rag_module().BatchedRAG(rag_system) if rag_system else None)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutdown: nettoyage des ressources si nécessaire.")
+    batched_rag = getattr(app.state, "batched_rag", None)
+    if batched_rag is not None:
+        await batched_rag.close()
+
+
+def read_source_lines(path: Path) -> list[str]:
+    """
+    Lire les lignes non vides d'un fichier de sources.
+
+    Le fichier est projeté en mémoire (mmap) et parcouru ligne par ligne en
+    octets, sans décoder le fichier entier: seules les lignes non vides
+    sont décodées en UTF-8.
+    """
+    with path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines = (line.decode("utf-8").strip()
+                     for line in iter(mm.readline, b"") if line.strip())
+            return [line for line in lines if line]
 
 
-def find_relevant_snippets(query: str, sources: list[str], max_results: int = 5):
+def build_word_index(sources: list[str]) -> dict[str, set[int]]:
+    """
+    Construire un index inversé mot -> indices des lignes de sources.
+
+    Les mots sont les suites de >=3 caractères alphanumériques en minuscules,
+    comme pour les mots de la requête dans find_relevant_snippets.
+    """
+    index = defaultdict(set)
+    for i, line in enumerate(sources):
+        for word in _WORD_RE.findall(line.lower()):
+            index[word].add(i)
+    return dict(index)
+
+
+def find_relevant_snippets(
+    query: str,
+    sources: list[str],
+    word_index: dict[str, set[int]],
+    max_results: int = 5,
+):
     # Extraire mots de >=3 lettres pour la recherche simple
-    words = [w.lower() for w in re.findall(r"\w{3,}", query)]
-    results = []
-    for line in sources:
-        lw = line.lower()
-        if any(w in lw for w in words):
-            results.append(line)
-            if len(results) >= max_results:
-                break
-    return results
+    words = set(_WORD_RE.findall(query.lower()))
+    if not words:
+        return []
+
+    # Un mot de la requête apparaît dans une ligne si et seulement s'il est
+    # contenu dans l'un de ses mots indexés: on parcourt le vocabulaire
+    # (bien plus petit que le texte des sources) au lieu de chaque ligne.
+    if ahocorasick is not None and len(words) > 1:
+        # Automate Aho-Corasick: un seul passage par mot indexé,
+        # quel que soit le nombre de mots de la requête
+        automaton = ahocorasick.Automaton()
+        for w in words:
+            automaton.add_word(w, w)
+        automaton.make_automaton()
+
+        def contains_word(token: str) -> bool:
+            return next(automaton.iter(token), None) is not None
+    else:
+        def contains_word(token: str) -> bool:
+            return any(w in token for w in words)
+
+    matches = set()
+    for token, lines in word_index.items():
+        if contains_word(token):
+            matches |= lines
+
+    # Conserver l'ordre du fichier de sources
+    return [sources[i] for i in sorted(matches)[:max_results]]
+
+
+def _rag_module():
+    """
+    Importer le module rag_system au premier usage.
+
+    Il charge torch, transformers et sentence-transformers: le démarrage de
+    l'API et les endpoints sans RAG (/api/health, /api/stats) n'en paient
+    pas le coût.
+    """
+    package = __package__ or "src.backend"
+    return importlib.import_module(f"{package}.rag_system")
+
+
+async def _get_batched_rag():
+    """
+    Retourner le regroupeur de requêtes associé au système RAG courant.
+
+    Si le système RAG a été remplacé, l'ancien regroupeur est fermé (ses
+    tâches sont arrêtées et ses requêtes en attente échouent).
+    """
+    batched_rag = getattr(app.state, "batched_rag", None)
+    if batched_rag is None or batched_rag.rag is not rag_system:
+        # Remplacer avant de fermer: les requêtes concurrentes utilisent
+        # déjà le nouveau regroupeur pendant la fermeture de l'ancien
+        previous = batched_rag
+        batched_rag = _rag_module().BatchedRAG(rag_system)
+        app.state.batched_rag = batched_rag
+        if previous is not None:
+            await previous.close()
+    return batched_rag
+
+
+async def _cached_rag(query_norm: str) -> Dict[str, Any]:
+    """
+    Exécuter le pipeline RAG avec mise en cache par requête normalisée.
+
+    Les requêtes absentes du cache sont traitées en micro-lots par
+    BatchedRAG. Le résultat est partagé entre les appels: ne pas le
+    modifier. Le cache est vidé lorsque le corpus est réinitialisé
+    (/api/init); une réponse calculée avant la réinitialisation n'y est
+    pas enregistrée.
+    """
+    result = _rag_cache.get(query_norm)
+    if result is not None:
+        _rag_cache.move_to_end(query_norm)
+        return result
+
+    generation = _corpus_generation
+    batched_rag = await _get_batched_rag()
+    result = await batched_rag.chat_async(query_norm)
+    if generation != _corpus_generation:
+        return result
+    _rag_cache[query_norm] = result
+    if len(_rag_cache) > RAG_CACHE_SIZE:
+        _rag_cache.popitem(last=False)
+    return result
 
 
 # Endpoints
@@ -203,7 +339,8 @@ async def chat(request: ChatRequest):
         # Si le système RAG est initialisé, déléguer au rag_system
         if rag_system:
             try:
-                result = rag_system.chat(query)
+                query_norm = " ".join(query.lower().split())
+                result = await _cached_rag(query_norm)
                 response_text = result.get("response", "")
                 sources = result.get("sources", [])
                 context_used = result.get("context_used", False)
@@ -219,11 +356,14 @@ async def chat(request: ChatRequest):
         # Fallback : recherche simple dans app.state.sources
         if rag_fallback:
             sources_lines = getattr(app.state, "sources", []) or []
+            word_index = getattr(app.state, "word_index", {}) or {}
             snippets = find_relevant_snippets(
-                query, sources_lines, max_results=request.top_k or 5)
+                query, sources_lines, word_index, max_results=request.top_k or 5)
             if snippets:
-                response_text = "Informations trouvées :\n\n" + \
-                    "\n".join(snippets)
+                # Borner la taille de la réponse (sérialisation JSON, réseau)
+                snippets = [s[:MAX_SNIPPET_CHARS] for s in snippets]
+                body = "\n".join(snippets)
+                response_text = f"Informations trouvées :\n\n{body}"
                 sources = [{"text": s} for s in snippets]
                 context_used = False
                 num_sources = len(snippets)
@@ -249,7 +389,7 @@ async def chat(request: ChatRequest):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Erreur lors du traitement de la requête: {e}")
+        logger.error("Erreur lors du traitement de la requête: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Erreur lors du traitement de la requête"
@@ -273,7 +413,11 @@ async def initialize_corpus(background_tasks: BackgroundTasks):
             detail="Le système n'est pas initialisé"
         )
 
+    global _corpus_generation
     try:
+        # Les réponses en cours de calcul ne doivent plus être mises en cache
+        _corpus_generation += 1
+
         # Vider la base de données existante
         rag_system.clear_database()
 
@@ -284,6 +428,9 @@ async def initialize_corpus(background_tasks: BackgroundTasks):
         # Charger le corpus
         rag_system.load_corpus(str(CORPUS_PATH))
 
+        # Les réponses en cache ne correspondent plus au nouveau corpus
+        _rag_cache.clear()
+
         stats = data_loader.get_statistics()
 
         return InitResponse(
@@ -292,7 +439,7 @@ async def initialize_corpus(background_tasks: BackgroundTasks):
             message=f"Corpus initialisé avec {stats['total_documents']} documents"
         )
     except Exception as e:
-        logger.error(f"Erreur lors de l'initialisation: {e}")
+        logger.error("Erreur lors de l'initialisation: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Erreur lors de l'initialisation du corpus"
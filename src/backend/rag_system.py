@@ -3,31 +3,68 @@ Système RAG (Retrieval-Augmented Generation) pour Burkina Tourisme Chatbot
 
 Ce module implémente le pipeline complet RAG:
 1. Embeddings: Transformation du texte en vecteurs avec Sentence-Transformers
-2. Base de données vectorielle: Stockage et recherche avec ChromaDB
+2. Base de données vectorielle: Stockage et recherche avec FAISS (HNSW) ou ChromaDB
 3. LLM: Génération de réponses avec un modèle open source
 
 Technologies utilisées:
 - sentence-transformers: Embeddings multilingues
-- chromadb: Base de données vectorielle
+- faiss: Index vectoriel HNSW en mémoire (par défaut)
+- chromadb: Base de données vectorielle (repli si faiss est indisponible)
 - transformers: Modèles LLM
 """
 
-import json
+import asyncio
+import functools
+import hashlib
+import io
 import logging
 import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from functools import cached_property
 from typing import List, Dict, Tuple, Optional, Any
 from pathlib import Path
 
-import chromadb
-from chromadb.config import Settings
+import numpy as np
+import orjson
 from sentence_transformers import SentenceTransformer
-from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
+from transformers import AutoTokenizer, AutoModelForCausalLM
 import torch
 
+try:
+    import faiss
+except ImportError:  # faiss-cpu est optionnel: repli sur ChromaDB
+    faiss = None
+
+try:
+    import ijson  # lecture en flux du corpus (optionnel)
+    _IJSON_ERRORS: Tuple[type, ...] = (ijson.JSONError,)
+except ImportError:
+    ijson = None
+    _IJSON_ERRORS = ()
+
+try:
+    from numba import njit  # compilation JIT du filtre de seuil (optionnel)
+except ImportError:
+    def njit(**kwargs):
+        """Remplacement sans effet de numba.njit: la fonction reste en numpy."""
+        return lambda func: func
+
 from config import (
     EMBEDDING_MODEL,
+    EMBEDDING_CPU_BF16,
+    USE_GPU,
+    TORCH_NUM_THREADS,
+    VECTOR_STORE,
     CHROMA_DB_PATH_STR,
-    LLM_MODEL,
+    FAISS_INDEX_PATH_STR,
+    EMBEDDING_CACHE_PATH_STR,
+    LLM_LOCAL_MODEL,
+    ONNX_MODELS_PATH_STR,
     CORPUS_PATH,
     RAG_CONFIG,
     LLM_GENERATION_CONFIG,
@@ -38,24 +75,280 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@njit(cache=True)
+def _filter(distances: np.ndarray, max_distance: float) -> np.ndarray:
+    """
+    Indices des résultats dont la distance cosinus respecte le seuil.
+
+    Args:
+        distances: Distances cosinus d'une ligne de résultats
+        max_distance: Distance maximale acceptée (1 - seuil de similarité)
+
+    Returns:
+        Indices des résultats conservés, dans l'ordre d'origine
+    """
+    return np.where(distances <= max_distance)[0]
+
+
+def _device() -> str:
+    """Périphérique d'inférence: le GPU s'il est disponible et autorisé (USE_GPU)."""
+    return "cuda" if USE_GPU and torch.cuda.is_available() else "cpu"
+
+
+def _cached_loader(func):
+    """
+    Mettre en cache un chargeur de modèle, protégé par un verrou.
+
+    Sans verrou, plusieurs threads demandant le même modèle en même temps
+    (premières requêtes concurrentes) le chargeraient chacun.
+    """
+    cached = functools.lru_cache(maxsize=4)(func)
+    lock = threading.Lock()
+
+    @functools.wraps(func)
+    def wrapper(name: str):
+        with lock:
+            return cached(name)
+
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+
+@_cached_loader
+def _load_embedder(name: str) -> SentenceTransformer:
+    """
+    Charger un modèle d'embeddings une seule fois par processus.
+
+    Args:
+        name: Nom du modèle Sentence-Transformers
+
+    Returns:
+        Modèle en mode évaluation, en précision réduite si possible
+    """
+    logger.info(f"Chargement du modèle d'embeddings: {name}")
+    device = _device()
+    model = SentenceTransformer(name, device=device)
+
+    # Précision réduite: fp16 sur GPU, bf16 sur CPU si activé
+    if device == "cuda":
+        model.half()
+    elif EMBEDDING_CPU_BF16:
+        model.to(torch.bfloat16)
+    model.eval()
+    return model
+
+
+@_cached_loader
+def _load_llm(name: str) -> Optional[Tuple[Any, Any]]:
+    """
+    Charger le tokenizer et le LLM une seule fois par processus.
+
+    Utilise Hugging Face transformers pour charger un modèle LLM open source,
+    exécuté avec ONNX Runtime si optimum est installé.
+    Pour la production, considérer Ollama ou un serveur LLM local.
+
+    Args:
+        name: Nom du modèle Hugging Face
+
+    Returns:
+        Couple (tokenizer, modèle), ou None si le chargement a échoué
+    """
+    logger.info(f"Initialisation du LLM: {name}")
+    try:
+        # Essayer de charger un modèle léger pour les tests
+        # En production, utiliser Ollama ou un serveur LLM dédié
+        device = _device()
+
+        tokenizer = AutoTokenizer.from_pretrained(name)
+        # Tronquer le début du prompt (contexte) plutôt que la question
+        tokenizer.truncation_side = "left"
+
+        model = None
+        try:
+            model = _load_onnx_model(name, device)
+            logger.info(f"LLM initialisé avec ONNX Runtime: {name}")
+        except ImportError:
+            logger.info("optimum non installé, utilisation de PyTorch")
+        except Exception as e:
+            # Export, quantification ou fournisseur d'exécution indisponible
+            logger.warning(
+                f"Échec du chargement ONNX ({e}), utilisation de PyTorch")
+
+        if model is None:
+            model = AutoModelForCausalLM.from_pretrained(
+                name,  # Modèle léger pour les tests
+                torch_dtype=torch.float32 if device == "cpu" else torch.float16,
+            ).to(device)
+            model.eval()
+            if device == "cpu":
+                # Quantification dynamique int8 des couches linéaires
+                _conv1d_to_linear(model)
+                model = torch.ao.quantization.quantize_dynamic(
+                    model, {torch.nn.Linear}, dtype=torch.qint8)
+            logger.info(f"LLM initialisé avec {name}")
+        return tokenizer, model
+    except Exception as e:
+        logger.warning(f"Erreur lors du chargement du LLM: {e}")
+        logger.info(
+            "Utilisation d'une génération simple basée sur les templates")
+        return None
+
+
+def _conv1d_to_linear(model: torch.nn.Module) -> None:
+    """
+    Remplacer les couches Conv1D de transformers par des nn.Linear.
+
+    GPT-2 implémente l'attention et le MLP avec Conv1D (poids de forme
+    (entrées, sorties)), que quantize_dynamic ne prend pas en charge. Une fois
+    converties, ces couches sont quantifiées en int8 comme les autres.
+
+    Args:
+        model: Modèle modifié sur place
+    """
+    from transformers.pytorch_utils import Conv1D
+
+    for parent in list(model.modules()):
+        for child_name, child in list(parent.named_children()):
+            if isinstance(child, Conv1D):
+                in_features, out_features = child.weight.shape
+                linear = torch.nn.Linear(
+                    in_features, out_features, dtype=child.weight.dtype)
+                linear.weight.data = child.weight.data.t().contiguous()
+                linear.bias.data = child.bias.data
+                setattr(parent, child_name, linear)
+
+
+def _load_onnx_model(name: str, device: str):
+    """
+    Charger le LLM exporté en ONNX avec ONNX Runtime.
+
+    L'export ONNX est conservé dans ONNX_MODELS_PATH pour ne pas être refait
+    à chaque démarrage. Sur GPU, le modèle est exécuté par le fournisseur
+    CUDA. Sur CPU, il est quantifié dynamiquement en int8 (conservé aussi).
+
+    Args:
+        name: Nom du modèle Hugging Face
+        device: "cuda" ou "cpu"
+
+    Returns:
+        Modèle ORTModelForCausalLM (compatible avec generate())
+
+    Raises:
+        ImportError: Si optimum[onnxruntime] n'est pas installé
+    """
+    from optimum.onnxruntime import ORTModelForCausalLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    onnx_dir = Path(ONNX_MODELS_PATH_STR) / name.replace("/", "--")
+    if not (onnx_dir / "model.onnx").exists():
+        logger.info(f"Export ONNX de {name}")
+        model = ORTModelForCausalLM.from_pretrained(name, export=True)
+        model.save_pretrained(onnx_dir)
+
+    if device == "cuda":
+        return ORTModelForCausalLM.from_pretrained(
+            onnx_dir, file_name="model.onnx", provider="CUDAExecutionProvider")
+
+    if not (onnx_dir / "model_quantized.onnx").exists():
+        logger.info(f"Quantification int8 de {name}")
+        quantizer = ORTQuantizer.from_pretrained(onnx_dir, file_name="model.onnx")
+        quantizer.quantize(
+            save_dir=onnx_dir,
+            quantization_config=AutoQuantizationConfig.avx2(
+                is_static=False, per_channel=False),
+        )
+    return ORTModelForCausalLM.from_pretrained(
+        onnx_dir, file_name="model_quantized.onnx")
+
+
 class RAGSystem:
     """
     Système RAG complet pour le chatbot touristique du Burkina Faso.
 
     Attributes:
         embedding_model: Modèle Sentence-Transformers pour les embeddings
+        use_faiss: True si l'index FAISS est utilisé à la place de ChromaDB
+        index: Index FAISS HNSW quantifié int8 (produit scalaire sur vecteurs normalisés)
         chroma_client: Client ChromaDB pour la base de données vectorielle
         collection: Collection ChromaDB pour stocker les documents
-        llm_pipeline: Pipeline de génération de texte
+        llm: Couple (tokenizer, modèle) du LLM, chargé au premier usage
+             (None si indisponible)
     """
 
-    def __init__(self):
-        """Initialiser le système RAG avec tous les composants."""
+    # Réponses générales pour les questions conversationnelles
+    GENERAL_RESPONSES = {
+        "bonjour": "Bonjour! Je suis votre assistant touristique pour le Burkina Faso. Comment puis-je vous aider?",
+        "salut": "Salut! Bienvenue. Je suis ici pour répondre à vos questions sur le tourisme au Burkina Faso.",
+        "merci": "De rien! N'hésitez pas à me poser d'autres questions.",
+        "au revoir": "Au revoir! Bon voyage au Burkina Faso!",
+    }
+    # Tous les mots-clés en une seule alternance: un seul passage sur la requête
+    _FALLBACK_RE = re.compile(
+        r"\b(" + "|".join(map(re.escape, GENERAL_RESPONSES)) + r")\b")
+
+    def __init__(self, preload_llm: bool = False):
+        """
+        Initialiser le système RAG.
+
+        Le LLM n'est chargé qu'à la première génération de réponse, ce qui
+        évite de charger ses poids pour un usage limité à la récupération
+        (indexation du corpus, évaluation).
+
+        Args:
+            preload_llm: Charger le LLM immédiatement plutôt qu'au premier usage
+        """
         logger.info("Initialisation du système RAG...")
 
-        # Initialiser le modèle d'embeddings
-        logger.info(f"Chargement du modèle d'embeddings: {EMBEDDING_MODEL}")
-        self.embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+        # Initialiser le modèle d'embeddings (partagé entre les instances)
+        self.embedding_model = _load_embedder(EMBEDDING_MODEL)
+
+        # Paralléliser les opérations intra-op sur tous les coeurs
+        torch.set_num_threads(TORCH_NUM_THREADS)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Ne peut être défini qu'avant le premier travail parallèle
+            pass
+
+        # Cache LRU des embeddings de requêtes (désactivable pour les tests)
+        self._query_cache_size = RAG_CONFIG.get("query_cache_size", 0)
+        self._query_cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+
+        # Seuil exprimé en distance cosinus, comparable aux résultats bruts
+        self._dist_threshold = 1.0 - RAG_CONFIG["similarity_threshold"]
+
+        # Cache persistant des embeddings du corpus, indexé par contenu
+        self.emb_cache_path = EMBEDDING_CACHE_PATH_STR or None
+        if self.emb_cache_path:
+            with closing(sqlite3.connect(self.emb_cache_path)) as conn, conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings "
+                    "(hash BLOB PRIMARY KEY, vec BLOB)")
+
+        # Initialiser la base de données vectorielle
+        self.use_faiss = VECTOR_STORE == "faiss" and faiss is not None
+        if VECTOR_STORE == "faiss" and faiss is None:
+            logger.warning("faiss n'est pas installé, utilisation de ChromaDB")
+
+        # Protège l'état FAISS (index, documents, vecteurs exacts) partagé
+        # entre les threads de recherche et l'ingestion
+        self._index_lock = threading.RLock()
+        if self.use_faiss:
+            self._init_faiss_index()
+        else:
+            self._init_chroma()
+
+        if preload_llm:
+            _ = self.llm  # Déclenche le chargement du LLM
+
+        logger.info("Système RAG initialisé avec succès")
+
+    def _init_chroma(self) -> None:
+        """Initialiser le client et la collection ChromaDB."""
+        # Importé ici: inutile (et coûteux) avec le stockage FAISS par défaut
+        import chromadb
+        from chromadb.config import Settings
 
         # Initialiser ChromaDB (mise à jour pour la nouvelle configuration)
         logger.info(f"Initialisation de ChromaDB à: {CHROMA_DB_PATH_STR}")
@@ -78,53 +371,243 @@ class RAGSystem:
             logger.info(f"ChromaDB initialisé avec succès à: {self.db_path}")
 
             # Création ou récupération de la collection
-            self.collection = self.chroma_client.get_or_create_collection(
-                name="burkina_tourisme",
-                metadata={"hnsw:space": "cosine"}
-            )
+            self.collection = self._get_or_create_collection()
 
         except Exception as e:
             logger.error(
                 f"Erreur lors de l'initialisation de ChromaDB: {str(e)}")
             raise
 
-        # Initialiser le pipeline LLM
-        logger.info(f"Initialisation du pipeline LLM: {LLM_MODEL}")
-        self._init_llm_pipeline()
+    def _get_or_create_collection(self):
+        """
+        Créer ou récupérer la collection ChromaDB avec ses paramètres HNSW.
 
-        logger.info("Système RAG initialisé avec succès")
+        Les paramètres de construction ne s'appliquent qu'à la création;
+        une collection existante conserve les siens.
+        """
+        return self.chroma_client.get_or_create_collection(
+            name="burkina_tourisme",
+            metadata={
+                "hnsw:space": "cosine",
+                "hnsw:M": RAG_CONFIG["hnsw_m"],
+                "hnsw:construction_ef": RAG_CONFIG["hnsw_ef_construction"],
+                "hnsw:search_ef": RAG_CONFIG["hnsw_ef_search"],
+                "hnsw:num_threads": os.cpu_count() or 1,
+            }
+        )
 
-    def _init_llm_pipeline(self):
+    def set_search_ef(self, ef: int) -> None:
         """
-        Initialiser le pipeline LLM.
+        Ajuster la largeur de recherche HNSW des requêtes.
 
-        Utilise Hugging Face transformers pour charger un modèle LLM open source.
-        Pour la production, considérer Ollama ou un serveur LLM local.
+        Une valeur basse réduit la latence des requêtes interactives, une
+        valeur haute améliore le rappel (évaluation hors ligne).
+
+        Args:
+            ef: Nombre de candidats explorés par requête
         """
-        try:
-            # Essayer de charger un modèle léger pour les tests
-            # En production, utiliser Ollama ou un serveur LLM dédié
-            device = 0 if torch.cuda.is_available() else -1
-
-            self.llm_pipeline = pipeline(
-                "text-generation",
-                model="gpt2",  # Modèle léger pour les tests
-                device=device,
-                torch_dtype=torch.float32 if device == -1 else torch.float16,
+        if self.use_faiss:
+            self.index.hnsw.efSearch = ef
+        else:
+            self.collection.modify(configuration={"hnsw": {"ef_search": ef}})
+        logger.info(f"efSearch HNSW fixé à {ef}")
+
+    def _init_faiss_index(self) -> None:
+        """Charger l'index FAISS persisté ou en créer un nouveau."""
+        logger.info(f"Initialisation de l'index FAISS à: {FAISS_INDEX_PATH_STR}")
+        os.makedirs(FAISS_INDEX_PATH_STR, exist_ok=True)
+        self.index_path = os.path.join(FAISS_INDEX_PATH_STR, "index.faiss")
+        self.docs_path = os.path.join(FAISS_INDEX_PATH_STR, "docs.json")
+        self.vecs_path = os.path.join(FAISS_INDEX_PATH_STR, "vectors.npy")
+
+        if os.path.exists(self.index_path) and os.path.exists(self.docs_path):
+            self.index = faiss.read_index(self.index_path)
+            self.index.hnsw.efSearch = RAG_CONFIG["hnsw_ef_search"]
+            with open(self.docs_path, 'rb') as f:
+                self._docs = orjson.loads(f.read())
+            self._vecs = (np.load(self.vecs_path)
+                          if os.path.exists(self.vecs_path) else None)
+            if self._vecs is None or len(self._vecs) != self.index.ntotal:
+                # Vecteurs exacts absents (index antérieur au reclassement)
+                # ou désynchronisés: décodés depuis l'index SQ8
+                self._vecs = self.index.reconstruct_n(0, self.index.ntotal)
+            self._vecs = self._vecs.astype(np.float16, copy=False)
+            self._new_vecs = []
+
+            if len(self._docs) == self.index.ntotal:
+                logger.info(f"Index FAISS chargé: {len(self._docs)} documents")
+                return
+            logger.warning(
+                f"Index FAISS incohérent ({self.index.ntotal} vecteurs, "
+                f"{len(self._docs)} documents): index vide, relancer /api/init")
+
+        self.index = self._new_faiss_index()
+        self._docs = []
+        self._vecs = self._empty_vecs()
+        self._new_vecs = []
+
+    def _new_faiss_index(self):
+        """
+        Créer un index FAISS HNSW vide.
+
+        Les vecteurs sont normalisés (L2): le produit scalaire est alors
+        égal à la similarité cosinus. Ils sont stockés quantifiés sur 8 bits
+        (4x moins de mémoire qu'en float32). Le quantificateur est entraîné
+        sur les bornes fixes [-1, 1] des composantes d'un vecteur normalisé,
+        et non sur le premier lot ajouté: un lot de quelques documents
+        donnerait des intervalles quasi nuls qui écrêteraient les suivants.
+        """
+        dim = self.embedding_model.get_sentence_embedding_dimension()
+        index = faiss.IndexHNSWSQ(
+            dim, faiss.ScalarQuantizer.QT_8bit, RAG_CONFIG["hnsw_m"],
+            faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = RAG_CONFIG["hnsw_ef_construction"]
+        index.hnsw.efSearch = RAG_CONFIG["hnsw_ef_search"]
+        index.train(np.array([[-1.0] * dim, [1.0] * dim], dtype=np.float32))
+        return index
+
+    def _exact_vecs(self) -> np.ndarray:
+        """
+        Matrice des embeddings exacts, alignée sur les positions de l'index.
+
+        Ils sont conservés en fp16: avec l'index SQ8, le stockage total reste
+        inférieur à celui d'un index float32 non quantifié.
+
+        Les lots ajoutés depuis le dernier appel sont empilés en une seule
+        copie, plutôt qu'à chaque ajout (coût quadratique à l'ingestion).
+        """
+        with self._index_lock:
+            if self._new_vecs:
+                self._vecs = np.vstack([self._vecs, *self._new_vecs])
+                self._new_vecs = []
+            return self._vecs
+
+    def _empty_vecs(self) -> np.ndarray:
+        """Matrice vide des embeddings exacts (fp16) des documents."""
+        dim = self.embedding_model.get_sentence_embedding_dimension()
+        return np.empty((0, dim), dtype=np.float16)
+
+    def _save_faiss_index(self) -> None:
+        """
+        Persister l'index FAISS, les documents et leurs embeddings exacts.
+
+        Les trois fichiers sont d'abord écrits en entier dans des fichiers
+        temporaires, puis renommés (os.replace, atomique): une interruption
+        ne laisse jamais de fichier tronqué.
+        """
+        with self._index_lock:
+            vecs = io.BytesIO()
+            np.save(vecs, self._exact_vecs())
+            contents = {
+                self.index_path: faiss.serialize_index(self.index).tobytes(),
+                self.docs_path: orjson.dumps(self._docs),
+                self.vecs_path: vecs.getvalue(),
+            }
+            for path, data in contents.items():
+                with open(path + ".tmp", 'wb') as f:
+                    f.write(data)
+            for path in contents:
+                os.replace(path + ".tmp", path)
+
+    def rerank(
+        self,
+        query_embedding: np.ndarray,
+        candidate_ids: np.ndarray,
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Reclasser des candidats avec la similarité cosinus exacte.
+
+        Les embeddings stockés et la requête étant normalisés, la similarité
+        se réduit à un produit matrice-vecteur (un seul appel BLAS).
+
+        Args:
+            query_embedding: Embedding normalisé de la requête
+            candidate_ids: Positions des candidats dans l'index
+            k: Nombre de documents à conserver
+
+        Returns:
+            Couple (positions, similarités) des k meilleurs candidats,
+            par similarité décroissante
+        """
+        candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        # Seuls les candidats sont convertis en float32 pour le calcul
+        candidates = self._exact_vecs()[candidate_ids].astype(np.float32)
+        scores = candidates @ query_embedding
+        if k < len(scores):
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return candidate_ids[top], scores[top]
+
+    def _query_index(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int
+    ) -> Dict[str, List[List[Any]]]:
+        """
+        Rechercher les plus proches voisins dans la base vectorielle.
+
+        Args:
+            query_embeddings: Embeddings des requêtes (une ligne par requête)
+            top_k: Nombre de documents à récupérer par requête
+
+        Returns:
+            Résultats au format ChromaDB ('ids', 'documents', 'metadatas',
+            'distances'), avec une distance cosinus (1 - similarité)
+        """
+        if not self.use_faiss:
+            # ChromaDB accepte directement un tableau numpy
+            return self.collection.query(
+                query_embeddings=np.asarray(query_embeddings, dtype=np.float32),
+                n_results=top_k,
             )
-            logger.info("Pipeline LLM initialisé avec GPT-2 (modèle léger)")
-        except Exception as e:
-            logger.warning(f"Erreur lors du chargement du LLM: {e}")
-            logger.info(
-                "Utilisation d'une génération simple basée sur les templates")
-            self.llm_pipeline = None
 
-    def add_documents(self, documents: List[Dict[str, str]]) -> None:
+        queries = np.array(query_embeddings, dtype=np.float32, ndmin=2)
+        faiss.normalize_L2(queries)
+        # Élargir la recherche approchée (scores SQ8) puis reclasser en exact
+        n_candidates = top_k * RAG_CONFIG["rerank_factor"]
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        # Positions, vecteurs exacts et documents doivent rester cohérents
+        # pendant toute la requête (ingestion ou vidage concurrents)
+        with self._index_lock:
+            _, indices = self.index.search(queries, n_candidates)
+            for query, row_indices in zip(queries, indices):
+                # FAISS renvoie -1 lorsqu'il y a moins de candidats que demandé
+                row_ids, row_scores = self.rerank(
+                    query, row_indices[row_indices >= 0], top_k)
+                hits = [(self._docs[i], 1.0 - float(score))
+                        for i, score in zip(row_ids, row_scores)]
+                results["ids"].append([doc["id"] for doc, _ in hits])
+                results["documents"].append([doc["text"] for doc, _ in hits])
+                results["metadatas"].append([doc["metadata"] for doc, _ in hits])
+                results["distances"].append([dist for _, dist in hits])
+        return results
+
+    @cached_property
+    def llm(self) -> Optional[Tuple[Any, Any]]:
+        """
+        Charger le tokenizer et le modèle LLM au premier accès.
+
+        Le modèle est partagé entre les instances (voir _load_llm).
+
+        Returns:
+            Couple (tokenizer, modèle), ou None si le chargement a échoué
+        """
+        return _load_llm(LLM_LOCAL_MODEL)
+
+    def add_documents(
+        self,
+        documents: List[Dict[str, str]],
+        persist: bool = True
+    ) -> None:
         """
         Ajouter des documents à la base de données vectorielle.
 
         Args:
             documents: Liste de dictionnaires avec 'id', 'text', 'metadata'
+            persist: Sauvegarder l'index FAISS après l'ajout
         """
         logger.info(
             f"Ajout de {len(documents)} documents à la base de données...")
@@ -133,19 +616,138 @@ class RAGSystem:
         ids = [doc["id"] for doc in documents]
         metadatas = [doc.get("metadata", {}) for doc in documents]
 
-        # Générer les embeddings
-        embeddings = self.embedding_model.encode(texts, show_progress_bar=True)
+        embeddings = self._embed_documents(texts)
 
-        # Ajouter à ChromaDB
-        self.collection.add(
-            ids=ids,
-            embeddings=embeddings.tolist(),
-            metadatas=metadatas,
-            documents=texts,
-        )
+        if self.use_faiss:
+            # Ajouter à l'index FAISS (vecteurs normalisés pour le cosinus)
+            with self._index_lock:
+                self.index.add(embeddings)
+                self._new_vecs.append(embeddings.astype(np.float16))
+                self._docs.extend(
+                    {"id": doc_id, "text": text, "metadata": metadata}
+                    for doc_id, text, metadata in zip(ids, texts, metadatas)
+                )
+                if persist:
+                    self._save_faiss_index()
+        else:
+            # Ajouter à ChromaDB
+            self.collection.add(
+                ids=ids,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                documents=texts,
+            )
 
         logger.info(f"✓ {len(documents)} documents ajoutés avec succès")
 
+    def _embed_documents(self, texts: List[str]) -> np.ndarray:
+        """
+        Calculer les embeddings normalisés des documents.
+
+        Les embeddings déjà présents dans le cache SQLite (clé: hash BLAKE2b
+        du modèle et du texte) sont relus; seuls les textes nouveaux ou
+        modifiés passent par le modèle, puis sont ajoutés au cache en fp16.
+
+        Args:
+            texts: Textes des documents
+
+        Returns:
+            Matrice float32 contiguë, une ligne normalisée par texte
+        """
+        dim = self.embedding_model.get_sentence_embedding_dimension()
+        embeddings = np.empty((len(texts), dim), dtype=np.float32)
+        keys = [self._embedding_key(text) for text in texts]
+        cached = self._load_cached_embeddings(keys)
+
+        miss_idx = []
+        for i, key in enumerate(keys):
+            vec = cached.get(key)
+            if vec is None:
+                miss_idx.append(i)
+            else:
+                embeddings[i] = np.frombuffer(vec, dtype=np.float16)
+        if cached:
+            logger.info(f"{len(texts) - len(miss_idx)} embeddings lus en cache")
+
+        if miss_idx:
+            # sentence-transformers trie déjà les textes par longueur pour ne
+            # remplir chaque lot que jusqu'à son plus long texte, puis
+            # restaure l'ordre d'origine.
+            with torch.inference_mode():
+                encoded = self.embedding_model.encode(
+                    [texts[i] for i in miss_idx],
+                    batch_size=RAG_CONFIG.get("embedding_batch_size", 64),
+                    show_progress_bar=True,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                )
+            # Le stockage reste en float32 quelle que soit la précision du modèle
+            embeddings[miss_idx] = encoded
+            self._store_cached_embeddings(
+                [keys[i] for i in miss_idx], encoded.astype(np.float16))
+
+        if len(miss_idx) < len(texts):
+            # Renormaliser les vecteurs relus en fp16
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings
+
+    @staticmethod
+    def _embedding_key(text: str) -> bytes:
+        """Clé de cache d'un texte, propre au modèle d'embeddings."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(EMBEDDING_MODEL.encode("utf-8"))
+        h.update(b"\0")
+        h.update(text.encode("utf-8"))
+        return h.digest()
+
+    def _load_cached_embeddings(self, keys: List[bytes]) -> Dict[bytes, bytes]:
+        """
+        Relire en une requête par paquet les embeddings présents en cache.
+
+        Args:
+            keys: Clés de cache recherchées
+
+        Returns:
+            Dictionnaire clé -> vecteur fp16 (octets) des clés trouvées
+        """
+        if not self.emb_cache_path:
+            return {}
+
+        found = {}
+        # Rester sous la limite du nombre de paramètres de SQLite
+        step = 500
+        with closing(sqlite3.connect(self.emb_cache_path)) as conn:
+            for start in range(0, len(keys), step):
+                chunk = keys[start:start + step]
+                rows = conn.execute(
+                    "SELECT hash, vec FROM embeddings WHERE hash IN "
+                    f"({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                found.update(rows)
+        return found
+
+    def _store_cached_embeddings(
+        self,
+        keys: List[bytes],
+        vectors: np.ndarray
+    ) -> None:
+        """
+        Enregistrer des embeddings (fp16) dans le cache.
+
+        Args:
+            keys: Clés de cache
+            vectors: Matrice fp16, une ligne par clé
+        """
+        if not self.emb_cache_path:
+            return
+
+        with closing(sqlite3.connect(self.emb_cache_path)) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, vec) VALUES (?, ?)",
+                zip(keys, (vec.tobytes() for vec in vectors)),
+            )
+
     def retrieve_documents(
         self,
         query: str,
@@ -164,34 +766,157 @@ class RAGSystem:
         if top_k is None:
             top_k = RAG_CONFIG["top_k"]
 
-        # Générer l'embedding de la requête
-        query_embedding = self.embedding_model.encode([query])[0]
+        # Générer l'embedding de la requête (mis en cache par texte normalisé)
+        query_embeddings = self.encode_queries([query])
 
         # Rechercher les documents similaires
-        results = self.collection.query(
-            query_embeddings=[query_embedding.tolist()],
-            n_results=top_k,
-        )
-
-        # Formater les résultats
-        retrieved_docs = []
-        if results["ids"] and len(results["ids"]) > 0:
-            for i, doc_id in enumerate(results["ids"][0]):
-                distance = results["distances"][0][i] if results["distances"] else 0
-                similarity = 1 - distance  # Convertir la distance en similarité
-
-                # Filtrer par seuil de similarité
-                if similarity >= RAG_CONFIG["similarity_threshold"]:
-                    retrieved_docs.append({
-                        "id": doc_id,
-                        "text": results["documents"][0][i],
-                        "metadata": results["metadatas"][0][i],
-                        "similarity": float(similarity),
-                    })
+        results = self._query_index(query_embeddings, top_k)
 
+        retrieved_docs = self._format_results(results, 0)
         logger.info(f"Documents récupérés: {len(retrieved_docs)}/{top_k}")
         return retrieved_docs
 
+    def retrieve_documents_batch(
+        self,
+        queries: List[str],
+        top_k: Optional[int] = None
+    ) -> List[List[Dict[str, str]]]:
+        """
+        Récupérer les documents pertinents pour plusieurs requêtes à la fois.
+
+        Les embeddings sont calculés en un seul appel et la recherche
+        vectorielle est faite en lot.
+
+        Args:
+            queries: Questions des utilisateurs
+            top_k: Nombre de documents à récupérer par requête
+
+        Returns:
+            Pour chaque requête, la liste des documents pertinents
+        """
+        return self.search_batch(self.encode_queries(queries), top_k)
+
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Calculer les embeddings normalisés de requêtes.
+
+        Les requêtes (normalisées) déjà présentes dans le cache LRU sont
+        servies depuis celui-ci; les autres sont encodées en un seul appel,
+        puis ajoutées au cache.
+
+        Args:
+            queries: Questions des utilisateurs
+
+        Returns:
+            Embeddings float32 des requêtes (une ligne par requête)
+        """
+        texts = [query.strip().lower() for query in queries]
+        dim = self.embedding_model.get_sentence_embedding_dimension()
+        embeddings = np.empty((len(texts), dim), dtype=np.float32)
+
+        misses: Dict[str, List[int]] = {}
+        with self._query_cache_lock:
+            for i, text in enumerate(texts):
+                vec = self._query_cache.get(text)
+                if vec is None:
+                    misses.setdefault(text, []).append(i)
+                else:
+                    self._query_cache.move_to_end(text)
+                    embeddings[i] = np.frombuffer(vec, dtype=np.float32)
+
+        if misses:
+            miss_texts = list(misses)
+            with torch.inference_mode():
+                encoded = self.embedding_model.encode(
+                    miss_texts,
+                    batch_size=32,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                ).astype(np.float32)
+            for text, vec in zip(miss_texts, encoded):
+                embeddings[misses[text]] = vec
+            self._cache_query_embeddings(miss_texts, encoded)
+        return embeddings
+
+    def _cache_query_embeddings(
+        self,
+        texts: List[str],
+        embeddings: np.ndarray
+    ) -> None:
+        """
+        Ajouter des embeddings de requêtes au cache LRU.
+
+        Les vecteurs sont stockés sous forme d'octets (float32) afin que les
+        valeurs mises en cache soient immuables.
+        """
+        if not self._query_cache_size:
+            return
+
+        with self._query_cache_lock:
+            for text, vec in zip(texts, embeddings):
+                self._query_cache[text] = vec.tobytes()
+                self._query_cache.move_to_end(text)
+            while len(self._query_cache) > self._query_cache_size:
+                self._query_cache.popitem(last=False)
+
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: Optional[int] = None
+    ) -> List[List[Dict[str, str]]]:
+        """
+        Rechercher en lot les documents pertinents à partir d'embeddings.
+
+        Args:
+            query_embeddings: Embeddings des requêtes (voir encode_queries)
+            top_k: Nombre de documents à récupérer par requête
+
+        Returns:
+            Pour chaque requête, la liste des documents pertinents
+        """
+        if top_k is None:
+            top_k = RAG_CONFIG["top_k"]
+
+        results = self._query_index(query_embeddings, top_k)
+
+        retrieved = [self._format_results(results, row)
+                     for row in range(len(query_embeddings))]
+        logger.info(f"Lot de {len(query_embeddings)} requêtes traité")
+        return retrieved
+
+    def _format_results(
+        self,
+        results: Dict[str, List[List[Any]]],
+        row: int
+    ) -> List[Dict[str, str]]:
+        """
+        Convertir une ligne de résultats de recherche en documents filtrés.
+
+        Args:
+            results: Résultats de _query_index
+            row: Indice de la requête dans le lot
+
+        Returns:
+            Documents au-dessus du seuil de similarité
+        """
+        # Filtrer par seuil en une opération vectorisée sur les distances
+        distances = np.asarray(results["distances"][row], dtype=np.float64)
+        keep = _filter(distances, self._dist_threshold)
+        similarities = 1.0 - distances[keep]
+
+        ids = results["ids"][row]
+        documents = results["documents"][row]
+        metadatas = results["metadatas"][row]
+        return [
+            {
+                "id": ids[i],
+                "text": documents[i],
+                "metadata": metadatas[i],
+                "similarity": float(similarity),
+            }
+            for i, similarity in zip(keep, similarities)
+        ]
+
     def generate_response(
         self,
         query: str,
@@ -211,7 +936,7 @@ class RAGSystem:
         context = self._build_context(context_docs)
 
         # Générer la réponse
-        if self.llm_pipeline:
+        if self.llm is not None:
             response = self._generate_with_llm(query, context)
         else:
             response = self._generate_with_template(query, context)
@@ -244,7 +969,7 @@ class RAGSystem:
         return "\n\n".join(context_parts)
 
     def _generate_with_llm(self, query: str, context: str) -> str:
-        """Générer une réponse avec le pipeline LLM."""
+        """Générer une réponse avec le LLM."""
         try:
             prompt = f"""Contexte:
 {context}
@@ -253,15 +978,32 @@ Question: {query}
 
 Réponse basée sur le contexte:"""
 
-            output = self.llm_pipeline(
+            tokenizer, model = self.llm
+            inputs = tokenizer(
                 prompt,
-                max_length=RAG_CONFIG.get("max_tokens", 512),
-                num_return_sequences=1,
-                temperature=LLM_GENERATION_CONFIG.get("temperature", 0.7),
-                top_p=LLM_GENERATION_CONFIG.get("top_p", 0.9),
-            )
+                return_tensors="pt",
+                truncation=True,
+                max_length=LLM_GENERATION_CONFIG.get("max_input_tokens", 768),
+            ).to(model.device)
+
+            # max_new_tokens (et non max_length) pour que la longueur du
+            # prompt ne réduise pas le budget de génération
+            with torch.inference_mode():
+                output = model.generate(
+                    **inputs,
+                    max_new_tokens=LLM_GENERATION_CONFIG.get("max_new_tokens", 256),
+                    do_sample=True,
+                    temperature=LLM_GENERATION_CONFIG.get("temperature", 0.7),
+                    top_p=LLM_GENERATION_CONFIG.get("top_p", 0.9),
+                    top_k=LLM_GENERATION_CONFIG.get("top_k", 50),
+                    use_cache=True,
+                    pad_token_id=tokenizer.eos_token_id,
+                )
 
-            response = output[0]["generated_text"].replace(prompt, "").strip()
+            # Décoder uniquement les tokens générés après le prompt
+            prompt_length = inputs["input_ids"].shape[1]
+            response = tokenizer.decode(
+                output[0, prompt_length:], skip_special_tokens=True).strip()
             return response
         except Exception as e:
             logger.error(f"Erreur lors de la génération LLM: {e}")
@@ -277,18 +1019,11 @@ Réponse basée sur le contexte:"""
 
     def _generate_fallback_response(self, query: str) -> str:
         """Générer une réponse de secours pour les questions sans contexte."""
-        # Réponses générales pour les questions conversationnelles
-        general_responses = {
-            "bonjour": "Bonjour! Je suis votre assistant touristique pour le Burkina Faso. Comment puis-je vous aider?",
-            "salut": "Salut! Bienvenue. Je suis ici pour répondre à vos questions sur le tourisme au Burkina Faso.",
-            "merci": "De rien! N'hésitez pas à me poser d'autres questions.",
-            "au revoir": "Au revoir! Bon voyage au Burkina Faso!",
-        }
-
         query_lower = query.lower().strip()
-        for key, response in general_responses.items():
-            if key in query_lower:
-                return response
+
+        match = self._FALLBACK_RE.search(query_lower)
+        if match:
+            return self.GENERAL_RESPONSES[match.group(1)]
 
         return "Je ne dispose pas d'informations spécifiques sur ce sujet. Pouvez-vous poser une question relative au tourisme au Burkina Faso?"
 
@@ -313,6 +1048,14 @@ Réponse basée sur le contexte:"""
         retrieved_docs = self.retrieve_documents(query)
 
         # Étape 2: Génération (Generation)
+        return self._complete_chat(query, retrieved_docs)
+
+    def _complete_chat(
+        self,
+        query: str,
+        retrieved_docs: List[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        """Générer la réponse de chat à partir des documents récupérés."""
         result = self.generate_response(query, retrieved_docs)
 
         # Ajouter des métadonnées
@@ -340,28 +1083,246 @@ Réponse basée sur le contexte:"""
             ...
         ]
 
+        Le fichier est lu en flux avec ijson lorsqu'il est installé, et les
+        documents sont encodés par lots: le JSON et les embeddings en cours
+        de calcul n'occupent que la taille d'un lot. Avec FAISS, les textes
+        et vecteurs indexés restent en mémoire pour tout le corpus.
+
         Args:
             corpus_path: Chemin vers le fichier corpus.json
         """
+        batch_size = RAG_CONFIG["ingest_batch_size"]
+        total = 0
         try:
-            with open(corpus_path, 'r', encoding='utf-8') as f:
-                documents = json.load(f)
-
-            logger.info(f"Corpus chargé: {len(documents)} documents")
-            self.add_documents(documents)
+            with open(corpus_path, 'rb') as f:
+                if ijson is not None:
+                    documents = ijson.items(f, 'item', use_float=True)
+                else:
+                    documents = orjson.loads(f.read())
+
+                batch = []
+                for doc in documents:
+                    batch.append(doc)
+                    if len(batch) >= batch_size:
+                        self.add_documents(batch, persist=False)
+                        total += len(batch)
+                        batch = []
+                if batch:
+                    self.add_documents(batch, persist=False)
+                    total += len(batch)
+
+            if self.use_faiss and total:
+                self._save_faiss_index()
+            logger.info(f"Corpus chargé: {total} documents")
         except FileNotFoundError:
             logger.warning(f"Corpus non trouvé à {corpus_path}")
-        except json.JSONDecodeError:
+        except (orjson.JSONDecodeError, *_IJSON_ERRORS):
             logger.error(f"Erreur de décodage JSON dans {corpus_path}")
+            if self.use_faiss and total:
+                # Ne pas servir un index tronqué: revenir à l'index sauvegardé
+                with self._index_lock:
+                    self._init_faiss_index()
+            raise
 
     def clear_database(self) -> None:
         """Vider la base de données vectorielle."""
+        with self._query_cache_lock:
+            self._query_cache.clear()
+
+        if self.use_faiss:
+            with self._index_lock:
+                self.index = self._new_faiss_index()
+                self._docs = []
+                self._vecs = self._empty_vecs()
+                self._new_vecs = []
+                self._save_faiss_index()
+            logger.info("Base de données vidée avec succès")
+            return
+
         try:
             self.chroma_client.delete_collection(name="burkina_tourisme")
-            self.collection = self.chroma_client.create_collection(
-                name="burkina_tourisme",
-                metadata={"hnsw:space": "cosine"}
-            )
+            self.collection = self._get_or_create_collection()
             logger.info("Base de données vidée avec succès")
         except Exception as e:
             logger.error(f"Erreur lors du vidage de la base de données: {e}")
+
+
+class BatchedRAG:
+    """
+    Regroupe les requêtes de chat concurrentes en micro-lots.
+
+    Les requêtes arrivant à quelques millisecondes d'intervalle partagent un
+    seul calcul d'embeddings et une seule recherche vectorielle; la
+    génération reste faite requête par requête. Les calculs bloquants sont
+    exécutés dans des threads pour ne pas bloquer la boucle d'événements.
+
+    Le calcul des embeddings et la recherche vectorielle sont deux étapes
+    reliées par une file d'un élément: l'encodage du lot suivant se fait
+    pendant la recherche du lot courant. Chaque étape a son propre thread,
+    et les générations un pool borné: chaque génération utilise déjà tous
+    les coeurs (torch), et elles ne doivent pas retarder l'encodage et la
+    recherche des lots suivants.
+
+    Attributes:
+        rag: Système RAG sous-jacent
+        max_batch: Taille maximale d'un lot
+        max_wait: Délai maximal (secondes) d'attente pour compléter un lot
+        max_generations: Nombre maximal de générations simultanées
+    """
+
+    def __init__(
+        self,
+        rag: RAGSystem,
+        max_batch: int = 32,
+        max_wait: float = 0.005,
+        max_generations: int = 2
+    ):
+        self.rag = rag
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_generations = max_generations
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._search_queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._search_worker: Optional[asyncio.Task] = None
+        self._pending = set()  # Générations en cours (références conservées)
+        self._futures = set()  # Requêtes en attente de réponse
+
+    async def chat_async(self, query: str) -> Dict[str, Any]:
+        """
+        Effectuer un cycle complet de chat RAG dans un micro-lot.
+
+        Args:
+            query: Question de l'utilisateur
+
+        Returns:
+            Dictionnaire avec 'response', 'sources', 'context_used'
+        """
+        if self._worker is None:
+            self._executors = {
+                "encode": ThreadPoolExecutor(1, thread_name_prefix="rag-encode"),
+                "search": ThreadPoolExecutor(1, thread_name_prefix="rag-search"),
+                "generate": ThreadPoolExecutor(
+                    self.max_generations, thread_name_prefix="rag-generate"),
+            }
+            self._queue = asyncio.Queue()
+            self._search_queue = asyncio.Queue(maxsize=1)
+            self._worker = asyncio.create_task(self._run())
+            self._search_worker = asyncio.create_task(self._run_search())
+
+        future = asyncio.get_running_loop().create_future()
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+        await self._queue.put((query, future))
+        return await future
+
+    async def close(self) -> None:
+        """
+        Arrêter les tâches de traitement des lots.
+
+        Les requêtes encore en file ou en cours de traitement échouent avec
+        une RuntimeError au lieu de rester en attente indéfiniment.
+        """
+        tasks = [self._worker, self._search_worker, *self._pending]
+        for task in tasks:
+            if task is not None:
+                task.cancel()
+        for task in tasks:
+            if task is not None:
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._worker = None
+        self._search_worker = None
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
+        self._executors = {}
+
+        error = RuntimeError("Traitement des lots arrêté")
+        for future in list(self._futures):
+            if not future.done():
+                future.set_exception(error)
+
+    async def _run(self) -> None:
+        """Boucle de collecte et d'encodage des lots."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._encode(batch)
+
+    async def _encode(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Encoder les requêtes du lot et le transmettre à l'étape de recherche."""
+        queries = [query for query, _ in batch]
+        try:
+            embeddings = await self._run_in(
+                "encode", self.rag.encode_queries, queries)
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        # Attend que la recherche du lot précédent ait démarré
+        await self._search_queue.put((batch, embeddings))
+
+    async def _run_search(self) -> None:
+        """Boucle de recherche vectorielle des lots encodés."""
+        while True:
+            batch, embeddings = await self._search_queue.get()
+            await self._process(batch, embeddings)
+
+    async def _process(
+        self,
+        batch: List[Tuple[str, asyncio.Future]],
+        embeddings: np.ndarray
+    ) -> None:
+        """Récupérer les documents du lot puis lancer les générations."""
+        try:
+            docs_per_query = await self._run_in(
+                "search", self.rag.search_batch, embeddings)
+        except Exception as e:
+            self._fail(batch, e)
+            return
+
+        for (query, future), docs in zip(batch, docs_per_query):
+            task = asyncio.create_task(self._respond(query, docs, future))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    def _run_in(self, stage: str, func, *args):
+        """Exécuter un calcul bloquant dans le pool de threads d'une étape."""
+        return asyncio.get_running_loop().run_in_executor(
+            self._executors[stage], func, *args)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[str, asyncio.Future]], error: Exception) -> None:
+        """Propager une erreur à toutes les requêtes d'un lot."""
+        logger.error(f"Erreur lors du traitement du lot: {error}")
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _respond(
+        self,
+        query: str,
+        docs: List[Dict[str, str]],
+        future: asyncio.Future
+    ) -> None:
+        """Générer la réponse d'une requête et résoudre son futur."""
+        try:
+            result = await self._run_in(
+                "generate", self.rag._complete_chat, query, docs)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)